@@ -1,4 +1,4 @@
-from typing import List, Any, Union, Dict, Callable, Tuple
+from typing import List, Any, Union, Dict, Callable, Tuple, Optional
 
 import ray
 from ray.experimental.workflow import workflow_context
@@ -30,7 +30,8 @@ class WorkflowNotResumableError(Exception):
 def _recover_workflow_step(input_object_refs: List[str],
                            input_workflows: List[Any],
                            input_workflow_refs: List[WorkflowRef],
-                           instant_workflow_inputs: Dict[int, StepID]):
+                           instant_workflow_inputs: Dict[int, StepID],
+                           func_body_digest: Optional[str]):
     """A workflow step that recovers the output of an unfinished step.
 
     Args:
@@ -43,6 +44,8 @@ def _recover_workflow_step(input_object_refs: List[str],
         instant_workflow_inputs: Same as 'input_workflows', but they come
             point to workflow steps that have output checkpoints. They override
             corresponding workflows in 'input_workflows'.
+        func_body_digest: The digest of the function body of the
+            (original) step, if any.
 
     Returns:
         The output of the recovered step.
@@ -53,7 +56,7 @@ def _recover_workflow_step(input_object_refs: List[str],
         input_workflows[index] = reader.load_step_output(_step_id)
     input_object_refs = [reader.load_object_ref(r) for r in input_object_refs]
     step_id = workflow_context.get_current_step_id()
-    func: Callable = reader.load_step_func_body(step_id)
+    func: Callable = reader.load_step_func_body(step_id, func_body_digest)
     args, kwargs = reader.load_step_args(
         step_id, input_workflows, input_object_refs, input_workflow_refs)
     return func(*args, **kwargs)
@@ -61,7 +64,9 @@ def _recover_workflow_step(input_object_refs: List[str],
 
 def _construct_resume_workflow_from_step(
         reader: workflow_storage.WorkflowStorage,
-        step_id: StepID) -> Union[Workflow, StepID]:
+        step_id: StepID,
+        inspect_result: Optional[workflow_storage.StepInspectResult] = None
+) -> Union[Workflow, StepID]:
     """Try to construct a workflow (step) that recovers the workflow step.
     If the workflow step already has an output checkpointing file, we return
     the workflow step id instead.
@@ -69,12 +74,15 @@ def _construct_resume_workflow_from_step(
     Args:
         reader: The storage reader for inspecting the step.
         step_id: The ID of the step we want to recover.
+        inspect_result: The inspection result of the step. If it is None,
+            the step will be inspected.
 
     Returns:
         A workflow that recovers the step, or a ID of a step
         that contains the output checkpoint file.
     """
-    result: workflow_storage.StepInspectResult = reader.inspect_step(step_id)
+    result: workflow_storage.StepInspectResult = (inspect_result or
+                                                  reader.inspect_step(step_id))
     if result.output_object_valid:
         # we already have the output
         return step_id
@@ -86,8 +94,11 @@ def _construct_resume_workflow_from_step(
         raise WorkflowStepNotRecoverableError(step_id)
     input_workflows = []
     instant_workflow_outputs: Dict[int, str] = {}
-    for i, _step_id in enumerate(result.workflows):
-        r = _construct_resume_workflow_from_step(reader, _step_id)
+    # inspect all input steps in a batch
+    input_results = reader.inspect_steps(result.workflows)
+    for i, (_step_id, _result) in enumerate(
+            zip(result.workflows, input_results)):
+        r = _construct_resume_workflow_from_step(reader, _step_id, _result)
         if isinstance(r, Workflow):
             input_workflows.append(r)
         else:
@@ -98,7 +109,8 @@ def _construct_resume_workflow_from_step(
         max_retries=result.max_retries,
         catch_exceptions=result.catch_exceptions,
         **result.ray_options).step(result.object_refs, input_workflows,
-                                   workflow_refs, instant_workflow_outputs)
+                                   workflow_refs, instant_workflow_outputs,
+                                   result.func_body_digest)
     recovery_workflow._step_id = step_id
     recovery_workflow.data.step_type = result.step_type
     return recovery_workflow
@@ -162,11 +174,10 @@ def get_latest_output(workflow_id: str, store: storage.Storage) -> Any:
     try:
         step_id: StepID = reader.get_latest_progress()
         while True:
-            result: workflow_storage.StepInspectResult = reader.inspect_step(
-                step_id)
+            result, output = reader.inspect_step_with_output(step_id)
             if result.output_object_valid:
                 # we already have the output
-                return reader.load_step_output(step_id)
+                return output
             if isinstance(result.output_step_id, str):
                 step_id = result.output_step_id
             else:
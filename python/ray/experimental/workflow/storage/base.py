@@ -1,6 +1,7 @@
 import abc
+import asyncio
 from abc import abstractmethod
-from typing import Any, List
+from typing import Any, Callable, List, Optional, Tuple
 
 
 class DataLoadError(Exception):
@@ -19,6 +20,14 @@ class Storage(metaclass=abc.ABCMeta):
     """Abstract base class for the low-level workflow storage.
     This class only provides low level primitives, e.g. save a certain
     type of object.
+
+    Storage implementations whose "put" and "get" do not actually need to
+    wait (e.g. local files) can also provide "put_sync(key, data, is_json)"
+    and "get_sync(key, is_json)" with the same semantics. The workflow
+    storage calls them directly for single operations to avoid the
+    overhead of running an event loop. They are only used if they are
+    defined by the same class as "put" and "get" respectively, so a subclass
+    that only overrides "put" or "get" is not bypassed.
     """
 
     @abstractmethod
@@ -47,6 +56,79 @@ class Storage(metaclass=abc.ABCMeta):
             The object from storage.
         """
 
+    async def get_many(self, keys: List[str],
+                       is_json: bool = False) -> List[Optional[Any]]:
+        """Get a batch of objects from storage. Storage implementations
+        that can fetch multiple objects at once should override this. By
+        default, the objects are fetched concurrently.
+
+        Args:
+            keys: The keys of the objects.
+            is_json: True if the objects are json objects.
+
+        Returns:
+            The objects from storage, in the same order as the keys. The
+            object is None if its key does not exist.
+        """
+
+        async def _get(key: str) -> Optional[Any]:
+            try:
+                return await self.get(key, is_json)
+            except KeyNotFoundError:
+                return None
+
+        return await asyncio.gather(*[_get(key) for key in keys])
+
+    async def put_many(self, items: List[Tuple[str, Any, bool]]) -> None:
+        """Put a batch of objects into storage. Storage implementations
+        that can submit multiple writes at once should override this. By
+        default, the objects are put concurrently.
+
+        Args:
+            items: A list of (key, data, is_json) tuples.
+        """
+        await asyncio.gather(
+            *[self.put(key, data, is_json) for key, data, is_json in items])
+
+    async def update_json(self, key: str,
+                          mutator: Callable[[Any], Any]) -> Any:
+        """Update a json object in storage with read-modify-write. The
+        default implementation is a plain get followed by a put, so storage
+        implementations should override it with an atomic version when
+        possible.
+
+        Args:
+            key: The key of the object.
+            mutator: A function that takes the current object (None if the
+                object does not exist) and returns the updated object. If
+                it returns None, the object is left unchanged.
+
+        Returns:
+            The object after the update.
+        """
+        try:
+            value = await self.get(key, is_json=True)
+        except KeyNotFoundError:
+            value = None
+        new_value = mutator(value)
+        if new_value is None:
+            return value
+        await self.put(key, new_value, is_json=True)
+        return new_value
+
+    async def incr(self, key: str) -> int:
+        """Increment an integer counter in storage by one. If the counter
+        does not exist, it is initialized to 0. The increment is atomic if
+        `update_json` is atomic.
+
+        Args:
+            key: The key of the counter.
+
+        Returns:
+            The value of the counter after incrementing.
+        """
+        return await self.update_json(key, lambda v: 0 if v is None else v + 1)
+
     @abstractmethod
     async def delete_prefix(self, key_prefix: str) -> None:
         """Delete an object with prefix.
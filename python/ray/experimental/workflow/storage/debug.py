@@ -5,7 +5,7 @@ import pathlib
 from filelock import FileLock
 from ray.experimental.workflow.storage.base import Storage
 from ray.experimental.workflow.storage.filesystem import FilesystemStorageImpl
-import ray.cloudpickle
+from ray.experimental.workflow.storage import serialization
 from ray.experimental.workflow import serialization_context
 
 
@@ -67,7 +67,7 @@ class LoggedStorage(FilesystemStorageImpl):
         else:
             with open(path, "rb") as f:
                 with serialization_context.workflow_args_keeping_context():
-                    return ray.cloudpickle.load(f)
+                    return serialization.load(f)
 
     def __len__(self):
         with open(self._count, "r") as f:
@@ -1,14 +1,15 @@
+import asyncio
 import contextlib
 import itertools
-import json
 import shutil
 import pathlib
-from typing import Any, List
+from typing import Any, Callable, List, Optional
 import uuid
 
-from ray.experimental.workflow.storage.base import Storage, KeyNotFoundError
+from filelock import FileLock
 
-import ray.cloudpickle
+from ray.experimental.workflow.storage.base import Storage, KeyNotFoundError
+from ray.experimental.workflow.storage import serialization
 
 
 @contextlib.contextmanager
@@ -46,8 +47,7 @@ def _open_atomic(path: pathlib.Path, mode="r"):
         if path.exists():
             raise FileExistsError(path)
         tmp_new_fn = path.with_suffix(f".{path.name}.{uuid.uuid4().hex}")
-        if not tmp_new_fn.parent.exists():
-            tmp_new_fn.parent.mkdir(parents=True)
+        tmp_new_fn.parent.mkdir(parents=True, exist_ok=True)
         f = open(tmp_new_fn, mode)
         write_ok = True
         try:
@@ -71,8 +71,7 @@ def _open_atomic(path: pathlib.Path, mode="r"):
                 backup_path.unlink()
             path.rename(backup_path)
         tmp_new_fn = path.with_suffix(f".{path.name}.{uuid.uuid4().hex}")
-        if not tmp_new_fn.parent.exists():
-            tmp_new_fn.parent.mkdir(parents=True)
+        tmp_new_fn.parent.mkdir(parents=True, exist_ok=True)
         f = open(tmp_new_fn, mode)
         write_ok = True
         try:
@@ -94,6 +93,24 @@ def _open_atomic(path: pathlib.Path, mode="r"):
         raise ValueError(f"Unknown file open mode {mode}.")
 
 
+def _lock_path(path: pathlib.Path) -> pathlib.Path:
+    """The lock file of read-modify-write operations on the file. It is
+    hidden and kept next to the file, so it is deleted along with the file's
+    directory.
+
+    Args:
+        path: File path.
+
+    Returns:
+        The path of the lock file.
+    """
+    return path.with_name(f".{path.name}.lock")
+
+
+def _is_lock_file(name: str) -> bool:
+    return name.startswith(".") and name.endswith(".lock")
+
+
 def _file_exists(path: pathlib.Path) -> bool:
     """During atomic writing, we backup the original file. If the writing
     failed during the middle, then only the backup exists. We consider the
@@ -134,20 +151,60 @@ class FilesystemStorageImpl(Storage):
         return "/".join(itertools.chain([str(self._workflow_root_dir)], names))
 
     async def put(self, key: str, data: Any, is_json: bool = False) -> None:
+        self.put_sync(key, data, is_json)
+
+    def put_sync(self, key: str, data: Any, is_json: bool = False) -> None:
         if is_json:
-            with _open_atomic(pathlib.Path(key), "w") as f:
-                return json.dump(data, f)
+            with _open_atomic(pathlib.Path(key), "wb") as f:
+                f.write(serialization.dumps_json(data))
         else:
             with _open_atomic(pathlib.Path(key), "wb") as f:
-                return ray.cloudpickle.dump(data, f)
+                serialization.dump(data, f)
 
     async def get(self, key: str, is_json: bool = False) -> Any:
+        return self.get_sync(key, is_json)
+
+    def get_sync(self, key: str, is_json: bool = False) -> Any:
         if is_json:
-            with _open_atomic(pathlib.Path(key)) as f:
-                return json.load(f)
+            with _open_atomic(pathlib.Path(key), "rb") as f:
+                return serialization.loads_json(f.read())
         else:
             with _open_atomic(pathlib.Path(key), "rb") as f:
-                return ray.cloudpickle.load(f)
+                return serialization.load(f)
+
+    async def get_many(self, keys: List[str],
+                       is_json: bool = False) -> List[Optional[Any]]:
+        # reading local files does not benefit from concurrency
+        results = []
+        for key in keys:
+            try:
+                results.append(self.get_sync(key, is_json))
+            except KeyNotFoundError:
+                results.append(None)
+        return results
+
+    async def update_json(self, key: str,
+                          mutator: Callable[[Any], Any]) -> Any:
+        # Waiting for the lock blocks, so we do it outside of the event loop.
+        return await asyncio.get_event_loop().run_in_executor(
+            None, self._update_json, key, mutator)
+
+    def _update_json(self, key: str, mutator: Callable[[Any], Any]) -> Any:
+        path = pathlib.Path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # the lock makes the read-modify-write atomic across processes
+        with FileLock(str(_lock_path(path))):
+            try:
+                with _open_atomic(path, "rb") as f:
+                    value = serialization.loads_json(f.read())
+            except KeyNotFoundError:
+                value = None
+            new_value = mutator(value)
+            if new_value is None:
+                return value
+            with _open_atomic(path, "wb") as f:
+                f.write(serialization.dumps_json(new_value))
+        return new_value
 
     async def delete_prefix(self, key_prefix: str) -> None:
         path = pathlib.Path(key_prefix)
@@ -159,7 +216,9 @@ class FilesystemStorageImpl(Storage):
     async def scan_prefix(self, key_prefix: str) -> List[str]:
         try:
             path = pathlib.Path(key_prefix)
-            return [p.name for p in path.iterdir()]
+            return [
+                p.name for p in path.iterdir() if not _is_lock_file(p.name)
+            ]
         except FileNotFoundError:
             return []
 
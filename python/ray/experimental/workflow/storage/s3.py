@@ -1,15 +1,48 @@
+import atexit
 import tempfile
-import json
+import threading
 import urllib.parse as parse
+from botocore.config import Config
 from botocore.exceptions import ClientError
 import aioboto3
 import itertools
-import ray
-from typing import Any, List
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
 from ray.experimental.workflow.storage.base import Storage, KeyNotFoundError
-import ray.cloudpickle
+from ray.experimental.workflow.storage import serialization
 
 MAX_RECEIVED_DATA_MEMORY_SIZE = 25 * 1024 * 1024  # 25MB
+# The max number of connections kept by a client. The default of
+# botocore (10) throttles the concurrent requests of batch operations.
+MAX_POOL_CONNECTIONS = 64
+
+# S3 clients are bound to the event loop they are created in, so we keep one
+# client per storage and event loop, and reuse it (and its connections) for
+# all operations instead of connecting for every operation. The clients are
+# shared by all instances of the same storage, e.g. the ones unpickled in
+# every step. The futures of the clients are kept, so concurrent operations
+# wait for the same client to be created.
+_clients: Dict[Tuple[str, asyncio.AbstractEventLoop], asyncio.Future] = {}
+_clients_lock = threading.Lock()
+
+
+def _close_clients() -> None:
+    """Close the S3 clients whose event loops can still run."""
+    with _clients_lock:
+        clients = list(_clients.items())
+        _clients.clear()
+    for (_, loop), fut in clients:
+        if (loop.is_closed() or loop.is_running() or not fut.done()
+                or fut.cancelled() or fut.exception() is not None):
+            continue
+        try:
+            loop.run_until_complete(fut.result().__aexit__(None, None, None))
+        except Exception:
+            # Failing to close a client at exit is harmless.
+            pass
+
+
+atexit.register(_close_clients)
 
 
 class S3StorageImpl(Storage):
@@ -43,36 +76,67 @@ class S3StorageImpl(Storage):
         self._aws_secret_access_key = aws_secret_access_key
         self._aws_session_token = aws_session_token
         self._config = config
+        self._client_config = Config(max_pool_connections=MAX_POOL_CONNECTIONS)
+        if config is not None:
+            # options set by the user take precedence
+            self._client_config = self._client_config.merge(config)
+        self._storage_url = self.storage_url
 
     def make_key(self, *names: str) -> str:
         return "/".join(itertools.chain([self._s3_path], names))
 
     async def put(self, key: str, data: Any, is_json: bool = False) -> None:
+        s3 = await self._client()
+        await self._put(s3, key, data, is_json)
+
+    async def put_many(self, items: List[Tuple[str, Any, bool]]) -> None:
+        s3 = await self._client()
+        await asyncio.gather(*[
+            self._put(s3, key, data, is_json) for key, data, is_json in items
+        ])
+
+    async def _put(self, s3, key: str, data: Any, is_json: bool) -> None:
         with tempfile.SpooledTemporaryFile(
                 mode="w+b",
                 max_size=MAX_RECEIVED_DATA_MEMORY_SIZE) as tmp_file:
             if is_json:
-                tmp_file.write(json.dumps(data).encode())
+                tmp_file.write(serialization.dumps_json(data))
             else:
-                ray.cloudpickle.dump(data, tmp_file)
+                serialization.dump(data, tmp_file)
             tmp_file.seek(0)
-            async with self._client() as s3:
-                await s3.upload_fileobj(tmp_file, self._bucket, key)
+            await s3.upload_fileobj(tmp_file, self._bucket, key)
 
     async def get(self, key: str, is_json: bool = False) -> Any:
+        s3 = await self._client()
+        return await self._get(s3, key, is_json)
+
+    async def get_many(self, keys: List[str],
+                       is_json: bool = False) -> List[Optional[Any]]:
+        async def _get(s3, key: str) -> Optional[Any]:
+            try:
+                return await self._get(s3, key, is_json)
+            except KeyNotFoundError:
+                return None
+
+        s3 = await self._client()
+        return await asyncio.gather(*[_get(s3, key) for key in keys])
+
+    async def _get(self, s3, key: str, is_json: bool) -> Any:
         try:
-            with tempfile.SpooledTemporaryFile(
-                    mode="w+b",
-                    max_size=MAX_RECEIVED_DATA_MEMORY_SIZE) as tmp_file:
-                async with self._client() as s3:
-                    obj = await s3.get_object(Bucket=self._bucket, Key=key)
-                    async for chunk in obj["Body"]:
-                        tmp_file.write(chunk)
-                tmp_file.seek(0)
-                if is_json:
-                    return json.loads(tmp_file.read().decode())
-                else:
-                    return ray.cloudpickle.load(tmp_file)
+            obj = await s3.get_object(Bucket=self._bucket, Key=key)
+            # Stream the object into a single preallocated buffer. The
+            # out-of-band buffers of the object are deserialized as views
+            # of it without further copies.
+            data = bytearray(obj["ContentLength"])
+            view = memoryview(data)
+            offset = 0
+            async for chunk in obj["Body"]:
+                view[offset:offset + len(chunk)] = chunk
+                offset += len(chunk)
+            if is_json:
+                return serialization.loads_json(data)
+            else:
+                return serialization.loads(data)
         except ClientError as ex:
             if ex.response["Error"]["Code"] == "NoSuchKey":
                 raise KeyNotFoundError from ex
@@ -82,33 +146,59 @@ class S3StorageImpl(Storage):
     async def delete_prefix(self, key_prefix: str) -> None:
         async with self._session.resource(
                 "s3", endpoint_url=self._endpoint_url,
-                config=self._config) as s3:
+                config=self._client_config) as s3:
             bucket = await s3.Bucket(self._bucket)
             await bucket.objects.filter(Prefix=key_prefix).delete()
 
     async def scan_prefix(self, key_prefix: str) -> List[str]:
         keys = []
-        async with self._client() as s3:
-            if not key_prefix.endswith("/"):
-                key_prefix += "/"
-            paginator = s3.get_paginator("list_objects")
-            operation_parameters = {
-                "Bucket": self._bucket,
-                "Delimiter": "/",
-                "Prefix": key_prefix
-            }
-            page_iterator = paginator.paginate(**operation_parameters)
-            async for page in page_iterator:
-                for o in page.get("CommonPrefixes", []):  # "directories"
-                    keys.append(o.get("Prefix", ""))
-                for o in page.get("Contents", []):  # "files"
-                    keys.append(o.get("Key", ""))
+        s3 = await self._client()
+        if not key_prefix.endswith("/"):
+            key_prefix += "/"
+        paginator = s3.get_paginator("list_objects")
+        operation_parameters = {
+            "Bucket": self._bucket,
+            "Delimiter": "/",
+            "Prefix": key_prefix
+        }
+        page_iterator = paginator.paginate(**operation_parameters)
+        async for page in page_iterator:
+            for o in page.get("CommonPrefixes", []):  # "directories"
+                keys.append(o.get("Prefix", ""))
+            for o in page.get("Contents", []):  # "files"
+                keys.append(o.get("Key", ""))
         keys = [k.rstrip("/").split("/")[-1] for k in keys if k != ""]
         return keys
 
-    def _client(self):
-        return self._session.client(
-            "s3", endpoint_url=self._endpoint_url, config=self._config)
+    async def _client(self):
+        key = (self._storage_url, asyncio.get_event_loop())
+        with _clients_lock:
+            fut = _clients.get(key)
+            if fut is None:
+                # The clients of closed event loops cannot be used (or
+                # closed) anymore.
+                for k in [k for k in _clients if k[1].is_closed()]:
+                    del _clients[k]
+                fut = asyncio.ensure_future(self._create_client())
+                _clients[key] = fut
+        try:
+            # Shielded, so cancelling one operation does not cancel the
+            # creation of the client for the others.
+            return await asyncio.shield(fut)
+        except Exception:
+            # Do not keep a failed client, so the next operation retries.
+            with _clients_lock:
+                if (fut.done()
+                        and (fut.cancelled() or fut.exception() is not None)
+                        and _clients.get(key) is fut):
+                    del _clients[key]
+            raise
+
+    async def _create_client(self):
+        # The client is kept open until the process exits.
+        return await self._session.client(
+            "s3", endpoint_url=self._endpoint_url,
+            config=self._client_config).__aenter__()
 
     @property
     def storage_url(self) -> str:
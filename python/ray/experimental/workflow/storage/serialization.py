@@ -0,0 +1,131 @@
+"""
+This module serializes the objects stored by workflow storages.
+
+JSON objects are encoded with msgspec if it is installed, because it is
+much faster than the builtin json module. Otherwise json is used. Both of
+them produce standard JSON, so they can decode each other's data.
+
+Other objects are pickled with protocol 5 and their out-of-band buffers (e.g.
+the data of large numpy arrays) are framed after the pickle stream, so
+these buffers are written to and read from the storage without being
+copied through the pickle stream. The layout of a serialized object is:
+
+    | magic | #buffers | pickle size | buffer sizes | pickle | buffers |
+"""
+
+import json
+import os
+import struct
+from typing import Any, IO
+
+import ray.cloudpickle
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+if msgspec is not None:
+    _json_encoder = msgspec.json.Encoder()
+    _json_decoder = msgspec.json.Decoder()
+
+MAGIC = b"RWP5"
+# magic, number of buffers, size of the in-band pickle data
+_HEADER = struct.Struct("<4sIQ")
+_SIZE = struct.Struct("<Q")
+
+
+def dumps_json(obj: Any) -> bytes:
+    """Encode a JSON object.
+
+    Args:
+        obj: The JSON object to encode.
+
+    Returns:
+        The encoded JSON.
+    """
+    if msgspec is not None:
+        return _json_encoder.encode(obj)
+    return json.dumps(obj).encode()
+
+
+def loads_json(data: bytes) -> Any:
+    """Decode a JSON object.
+
+    Args:
+        data: The encoded JSON.
+
+    Returns:
+        The decoded JSON object.
+    """
+    if msgspec is not None:
+        try:
+            return _json_decoder.decode(data)
+        except msgspec.DecodeError:
+            # Data written by json could be a superset of standard JSON,
+            # e.g. "NaN".
+            pass
+    return json.loads(data)
+
+
+def dump(obj: Any, f: IO[bytes]) -> None:
+    """Serialize the object into a binary file object.
+
+    Args:
+        obj: The object to serialize.
+        f: The binary file object to write to.
+    """
+    buffers = []
+    inband = ray.cloudpickle.dumps(
+        obj, protocol=5, buffer_callback=buffers.append)
+    views = [b.raw() for b in buffers]
+    f.write(_HEADER.pack(MAGIC, len(views), len(inband)))
+    for v in views:
+        f.write(_SIZE.pack(v.nbytes))
+    f.write(inband)
+    for v in views:
+        f.write(v)
+
+
+def loads(data: bytearray) -> Any:
+    """Deserialize an object. The out-of-band buffers of the object are
+    not copied, they share memory with the data.
+
+    Args:
+        data: The serialized object. Data that does not start with the
+            magic bytes is treated as a legacy plain pickle.
+
+    Returns:
+        The deserialized object.
+    """
+    view = memoryview(data)
+    if bytes(view[:len(MAGIC)]) != MAGIC:
+        return ray.cloudpickle.loads(view)
+    _, num_buffers, inband_size = _HEADER.unpack_from(view)
+    offset = _HEADER.size
+    sizes = []
+    for _ in range(num_buffers):
+        sizes.append(_SIZE.unpack_from(view, offset)[0])
+        offset += _SIZE.size
+    inband = view[offset:offset + inband_size]
+    offset += inband_size
+    buffers = []
+    for size in sizes:
+        buffers.append(view[offset:offset + size])
+        offset += size
+    return ray.cloudpickle.loads(inband, buffers=buffers)
+
+
+def load(f: IO[bytes]) -> Any:
+    """Deserialize an object from a binary file.
+
+    Args:
+        f: The binary file to read from.
+
+    Returns:
+        The deserialized object.
+    """
+    # Read into a writable buffer, so the deserialized arrays are writable.
+    data = bytearray(os.fstat(f.fileno()).st_size)
+    f.readinto(data)
+    return loads(data)
@@ -10,6 +10,9 @@ from ray.exceptions import RaySystemError
 from ray.experimental import workflow
 from ray.experimental.workflow.tests import utils
 from ray.experimental.workflow import workflow_storage
+from ray.experimental.workflow import recovery
+from ray.experimental.workflow import storage
+from ray.experimental.workflow.common import Workflow
 
 
 @workflow.step
@@ -96,6 +99,36 @@ def test_recovery_non_exists_workflow(workflow_start_regular):
         ray.get(workflow.resume("this_workflow_id_does_not_exist"))
 
 
+def test_recovery_multiple_inputs(workflow_start_regular):
+    workflow_id = "test_recovery_multiple_inputs"
+    wf_storage = workflow_storage.WorkflowStorage(workflow_id,
+                                                  storage.get_global_storage())
+    x = source1.step()
+    y = append1.step("y")
+    z = join.step(x, y)
+    x._step_id = "x"
+    y._step_id = "y"
+    z._step_id = "z"
+    wf_storage.save_subworkflow(z)
+    wf_storage.save_step_output("x", "[source1]", None)
+
+    inspected_step_ids = []
+    inspect_step = wf_storage.inspect_step
+
+    def _inspect_step(step_id):
+        inspected_step_ids.append(step_id)
+        return inspect_step(step_id)
+
+    wf_storage.inspect_step = _inspect_step
+    r = recovery._construct_resume_workflow_from_step(wf_storage, "z")
+    assert isinstance(r, Workflow)
+    assert r.step_id == "z"
+    # the input steps are inspected in a batch
+    assert inspected_step_ids == ["z"]
+    # "x" is recovered from its output checkpoint, "y" is executed again
+    assert [w.step_id for w in r.data.inputs.workflows] == ["y"]
+
+
 driver_script = """
 import time
 from ray.experimental import workflow
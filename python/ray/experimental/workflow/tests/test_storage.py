@@ -1,11 +1,19 @@
+import gc
+import warnings
+
+import numpy as np
 import pytest
 import ray
 from ray._private import signature
 from ray.tests.conftest import *  # noqa
+from ray.experimental import workflow
 from ray.experimental.workflow import workflow_storage
 from ray.experimental.workflow import storage
 from ray.experimental.workflow.workflow_storage import asyncio_run
-from ray.experimental.workflow.common import StepType
+from ray.experimental.workflow.common import (StepType, WorkflowMetaData,
+                                              WorkflowStatus)
+from ray.experimental.workflow.storage.debug import (DebugStorage,
+                                                     LoggedStorage)
 
 
 def some_func(x):
@@ -36,6 +44,65 @@ async def test_kv_storage(workflow_start_regular):
     # TODO(suquark): Test "delete" once fully implemented.
 
 
+@pytest.mark.asyncio
+async def test_kv_storage_batch(workflow_start_regular):
+    kv_store = storage.get_global_storage()
+    json_data = {"hello": "world"}
+    bin_data = (31416).to_bytes(8, "big")
+    key_1 = kv_store.make_key("aaa", "bbb")
+    key_2 = kv_store.make_key("aaa", "ccc")
+    items = [(key_1, json_data, True), (key_2, bin_data, False)]
+    await kv_store.put_many(items)
+    assert json_data == await kv_store.get(key_1, is_json=True)
+    assert bin_data == await kv_store.get(key_2, is_json=False)
+    prefix = kv_store.make_key("aaa")
+    assert set(await kv_store.scan_prefix(prefix)) == {"bbb", "ccc"}
+    key_3 = kv_store.make_key("aaa", "ddd")
+    assert await kv_store.get_many(
+        [key_1, key_3], is_json=True) == [json_data, None]
+
+
+@pytest.mark.asyncio
+async def test_kv_storage_out_of_band_buffers(workflow_start_regular):
+    kv_store = storage.get_global_storage()
+    data = {"array": np.arange(1024), "fortran": np.ones((32, 16), order="F")}
+    key = kv_store.make_key("aaa", "bbb")
+    await kv_store.put(key, data)
+    loaded = await kv_store.get(key)
+    assert (loaded["array"] == data["array"]).all()
+    assert (loaded["fortran"] == data["fortran"]).all()
+    # loaded arrays should be writable
+    loaded["array"][0] = 42
+
+
+@pytest.mark.asyncio
+async def test_kv_storage_incr(workflow_start_regular):
+    kv_store = storage.get_global_storage()
+    key = kv_store.make_key("aaa", "counter")
+    assert [await kv_store.incr(key) for _ in range(3)] == [0, 1, 2]
+    assert await kv_store.get(key, is_json=True) == 2
+    # no other keys (e.g. lock files) are left behind
+    assert await kv_store.scan_prefix(kv_store.make_key("aaa")) == ["counter"]
+
+
+@pytest.mark.asyncio
+async def test_kv_storage_update_json(workflow_start_regular):
+    kv_store = storage.get_global_storage()
+    key = kv_store.make_key("aaa", "bbb")
+
+    def add_one(data):
+        return {"count": data["count"] + 1} if data else {"count": 0}
+
+    assert await kv_store.update_json(key, add_one) == {"count": 0}
+    assert await kv_store.update_json(key, add_one) == {"count": 1}
+    # returning None leaves the object unchanged
+    assert await kv_store.update_json(key, lambda _: None) == {"count": 1}
+    assert await kv_store.get(key, is_json=True) == {"count": 1}
+    # nothing (e.g. lock files) is left behind after deleting the objects
+    await kv_store.delete_prefix(kv_store.make_key("aaa"))
+    assert await kv_store.scan_prefix(kv_store.make_key("aaa")) == []
+
+
 def test_workflow_storage(workflow_start_regular):
     workflow_id = test_workflow_storage.__name__
     wf_storage = workflow_storage.WorkflowStorage(workflow_id,
@@ -172,6 +239,142 @@ def test_workflow_storage(workflow_start_regular):
     assert inspect_result == workflow_storage.StepInspectResult()
     assert not inspect_result.is_recoverable()
 
+    # test "inspect_steps"
+    assert wf_storage.inspect_steps(["some_step", "some_step6"]) == [
+        workflow_storage.StepInspectResult(output_object_valid=True),
+        workflow_storage.StepInspectResult()
+    ]
+
+    # the output metadata to update does not exist
+    with pytest.raises(storage.KeyNotFoundError):
+        asyncio_run(
+            wf_storage._update_dynamic_output("some_step6", "some_step7"))
+
+    # the class body saved without its digest
+    asyncio_run(
+        wf_storage._put((workflow_id, workflow_storage.CLASS_BODY), list))
+    assert wf_storage.load_actor_class_body() is list
+    # a class body saved by another storage replaces the loaded one
+    wf_storage.save_actor_class_body(int)
+    assert wf_storage.load_actor_class_body() is int
+    workflow_storage.WorkflowStorage(
+        workflow_id, storage.get_global_storage()).save_actor_class_body(str)
+    assert wf_storage.load_actor_class_body() is str
+
+
+def test_workflow_storage_subworkflow(workflow_start_regular):
+    workflow_id = test_workflow_storage_subworkflow.__name__
+    wf_storage = workflow_storage.WorkflowStorage(workflow_id,
+                                                  storage.get_global_storage())
+
+    @workflow.step
+    def add(a, b):
+        return a + b
+
+    inner = add.step(1, 2)
+    outer = add.step(inner, 3)
+    inner._step_id = "inner"
+    outer._step_id = "outer"
+    wf_storage.save_subworkflow(outer)
+
+    for step_id in ["inner", "outer"]:
+        inspect_result = wf_storage.inspect_step(step_id)
+        assert inspect_result.is_recoverable()
+        func_body = wf_storage.load_step_func_body(
+            step_id, inspect_result.func_body_digest)
+        assert func_body(1, 2) == 3
+    # the steps share the function body
+    assert (wf_storage.inspect_step("inner").func_body_digest ==
+            wf_storage.inspect_step("outer").func_body_digest)
+    assert wf_storage.inspect_step("outer").workflows == ["inner"]
+    assert wf_storage.load_step_args("inner", [], [], []) == ([1, 2], {})
+    assert wf_storage.load_step_args("outer", [3], [], []) == ([3, 3], {})
+
+    # the function body saved for the step alone
+    step_id = "some_step"
+    flattened_args = [signature.DUMMY_TYPE, 1, signature.DUMMY_TYPE, 2]
+    asyncio_run(
+        wf_storage._put(
+            wf_storage._key_step_input_metadata(step_id),
+            inner.data.to_metadata(), True))
+    asyncio_run(
+        wf_storage._put(
+            wf_storage._key_step_function_body(step_id), some_func))
+    asyncio_run(
+        wf_storage._put(wf_storage._key_step_args(step_id), flattened_args))
+    inspect_result = wf_storage.inspect_step(step_id)
+    assert inspect_result.is_recoverable()
+    assert inspect_result.func_body_digest is None
+    func_body = wf_storage.load_step_func_body(step_id,
+                                               inspect_result.func_body_digest)
+    assert func_body(33) == 34
+    assert wf_storage.load_step_args(step_id, [], [], []) == ([1, 2], {})
+
+    # the workflow is created again with other function bodies
+    @workflow.step
+    def sub(a, b):
+        return a - b
+
+    outer = sub.step(1, 2)
+    outer._step_id = "outer"
+    wf_storage.save_subworkflow(outer)
+    inspect_result = wf_storage.inspect_step("outer")
+    func_body = wf_storage.load_step_func_body("outer",
+                                               inspect_result.func_body_digest)
+    assert func_body(1, 2) == -1
+
+
+def test_workflow_storage_sync_fallback(workflow_start_regular, tmp_path):
+    workflow_id = test_workflow_storage_sync_fallback.__name__
+    global_storage = storage.get_global_storage()
+    # "DebugStorage" has no synchronous operations, so the synchronous
+    # methods go through the event loop instead.
+    debug_storage = DebugStorage(global_storage, str(tmp_path))
+    results = []
+    for store in [global_storage, debug_storage]:
+        wf_storage = workflow_storage.WorkflowStorage(workflow_id, store)
+        assert wf_storage._sync_storage == (store is global_storage)
+        assert wf_storage.load_workflow_meta() is None
+        wf_storage.save_workflow_meta(
+            WorkflowMetaData(status=WorkflowStatus.RUNNING))
+        wf_storage.advance_progress("some_step")
+        wf_storage.save_actor_class_body(int)
+        obj_ref = ray.put(np.arange(10))
+        wf_storage.save_object_ref(obj_ref)
+        results.append(
+            (wf_storage.load_workflow_meta().status,
+             wf_storage.get_latest_progress(),
+             wf_storage.load_actor_class_body(),
+             ray.get(wf_storage.load_object_ref(obj_ref.hex())).tolist()))
+        asyncio_run(store.delete_prefix(store.make_key(workflow_id)))
+    assert results[0] == results[1]
+    assert results[0] == (WorkflowStatus.RUNNING, "some_step", int,
+                          list(range(10)))
+    # "LoggedStorage" overrides "put" only, so "put_sync" must not be used
+    logged_storage = LoggedStorage(str(tmp_path / "logged"))
+    assert not workflow_storage.WorkflowStorage(workflow_id,
+                                                logged_storage)._sync_storage
+
+
+@pytest.mark.asyncio
+async def test_workflow_storage_in_running_loop(workflow_start_regular):
+    workflow_id = test_workflow_storage_in_running_loop.__name__
+    wf_storage = workflow_storage.WorkflowStorage(workflow_id,
+                                                  storage.get_global_storage())
+    await wf_storage.advance_progress_async("some_step")
+    with warnings.catch_warnings(record=True) as w:
+        warnings.simplefilter("always")
+        # a single operation, which could skip the event loop
+        with pytest.raises(RuntimeError):
+            wf_storage.get_latest_progress()
+        # multiple operations, which run in the event loop
+        with pytest.raises(RuntimeError):
+            wf_storage.inspect_step("some_step")
+        # unawaited coroutines are reported when they are collected
+        gc.collect()
+    assert not [x for x in w if "never awaited" in str(x.message)]
+    assert await wf_storage.get_latest_progress_async() == "some_step"
+
 
 if __name__ == "__main__":
     import sys
@@ -4,21 +4,25 @@ workflows.
 """
 
 import asyncio
+import hashlib
+import threading
+from collections import OrderedDict
 from typing import Dict, List, Optional, Any, Callable, Tuple, Union
 from dataclasses import dataclass
 
 import ray
+import ray.cloudpickle
 from ray._private import signature
 from ray.experimental.workflow import storage
-from ray.experimental.workflow.common import (Workflow, WorkflowData, StepID,
-                                              WorkflowMetaData, WorkflowStatus,
-                                              WorkflowRef, StepType)
+from ray.experimental.workflow.common import (
+    Workflow, StepID, WorkflowMetaData, WorkflowStatus, WorkflowRef, StepType)
 from ray.experimental.workflow import workflow_context
 from ray.experimental.workflow import serialization_context
 from ray.experimental.workflow.storage import (DataLoadError, DataSaveError,
                                                KeyNotFoundError)
 
 ArgsType = Tuple[List[Any], Dict[str, Any]]  # args and kwargs
+KeyPaths = Tuple[str, ...]  # name sections of a storage key
 
 # constants used for keys
 OBJECTS_DIR = "objects"
@@ -28,7 +32,13 @@ STEP_OUTPUTS_METADATA = "outputs.json"
 STEP_ARGS = "args.pkl"
 STEP_OUTPUT = "output.pkl"
 STEP_FUNC_BODY = "func_body.pkl"
+# Function and class bodies are stored under the digests of their pickles,
+# so identical bodies share one key, and a loaded body is never stale.
+BODIES_DIR = "bodies"
 CLASS_BODY = "class_body.pkl"
+# The digest of the class body. Without it, the class body is stored in
+# "CLASS_BODY".
+CLASS_BODY_DIGEST = "class_body.json"
 WORKFLOW_META = "workflow_meta.json"
 WORKFLOW_PROGRESS = "progress.json"
 # Without this counter, we're going to scan all steps to get the number of
@@ -36,11 +46,81 @@ WORKFLOW_PROGRESS = "progress.json"
 # many duplicates.
 DUPLICATE_NAME_COUNTER = "duplicate_name_counter"
 
+# The bits of the step files checked when inspecting a step.
+_STEP_FILE_BITS = {
+    STEP_OUTPUT: 1,
+    STEP_OUTPUTS_METADATA: 1 << 1,
+    STEP_INPUTS_METADATA: 1 << 2,
+    STEP_ARGS: 1 << 3,
+    STEP_FUNC_BODY: 1 << 4,
+}
+
+_thread_local = threading.local()
+
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """Get the event loop used for running storage operations. The loop is
+    created (or fetched) once per thread and reused afterwards, so we do not
+    pay the event loop policy lookup for every storage operation."""
+    loop = getattr(_thread_local, "loop", None)
+    if loop is None or loop.is_closed():
+        try:
+            loop = asyncio.get_event_loop()
+        except RuntimeError:
+            # There is no default event loop in non-main threads.
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+        _thread_local.loop = loop
+    return loop
+
+
+# Function and class bodies are loaded many times during recovery (e.g. once
+# per step of a loop), so we cache the loaded bodies in the process. The
+# cache is keyed by the storage URL and the storage key of the body. Only
+# the bodies stored under their digests are cached, because their keys are
+# never overwritten with other bodies.
+_BODY_CACHE_SIZE = 256
+_body_cache: "OrderedDict[Tuple[str, str], Any]" = OrderedDict()
+_body_cache_lock = threading.Lock()
+
+
+def _get_cached_body(cache_key: Tuple[str, str]) -> Optional[Any]:
+    with _body_cache_lock:
+        body = _body_cache.get(cache_key)
+        if body is not None:
+            _body_cache.move_to_end(cache_key)
+        return body
+
+
+def _cache_body(cache_key: Tuple[str, str], body: Any) -> Any:
+    with _body_cache_lock:
+        _body_cache[cache_key] = body
+        _body_cache.move_to_end(cache_key)
+        if len(_body_cache) > _BODY_CACHE_SIZE:
+            _body_cache.popitem(last=False)
+    return body
+
+
+def _check_no_running_loop() -> None:
+    # "asyncio._get_running_loop" is used because "asyncio.get_running_loop"
+    # is not available in py36.
+    if asyncio._get_running_loop() is not None:
+        raise RuntimeError(
+            "Cannot run workflow storage operations synchronously in a "
+            "running event loop. Use the async version of the operation "
+            "instead.")
+
 
 # TODO: Get rid of this and use asyncio.run instead once we don't support py36
 def asyncio_run(coro):
-    loop = asyncio.get_event_loop()
-    return loop.run_until_complete(coro)
+    try:
+        # The running loop cannot run the coroutine until we return, and
+        # running another loop in this thread is not allowed either.
+        _check_no_running_loop()
+    except RuntimeError:
+        coro.close()
+        raise
+    return _get_event_loop().run_until_complete(coro)
 
 
 @dataclass
@@ -69,6 +149,9 @@ class StepInspectResult:
     ray_options: Optional[Dict[str, Any]] = None
     # type of workflow step
     step_type: Optional[StepType] = None
+    # The digest of the function body of the step. If this field is not set,
+    # the function body is saved for the step alone.
+    func_body_digest: Optional[str] = None
 
     def is_recoverable(self) -> bool:
         return (self.output_object_valid or self.output_step_id
@@ -97,6 +180,22 @@ class WorkflowStorage:
     def __init__(self, workflow_id: str, store: storage.Storage):
         self._storage = store
         self._workflow_id = workflow_id
+        # These keys are used repeatedly (e.g. the progress is saved after
+        # every step of a virtual actor), so we make them only once.
+        self._workflow_meta_key = store.make_key(workflow_id, WORKFLOW_META)
+        self._workflow_progress_key = store.make_key(workflow_id, STEPS_DIR,
+                                                     WORKFLOW_PROGRESS)
+        self._class_body_key = store.make_key(workflow_id, CLASS_BODY)
+        self._class_body_digest_key = store.make_key(workflow_id,
+                                                     CLASS_BODY_DIGEST)
+        # The keys of a step are made many times (e.g. when inspecting,
+        # saving and loading the step), so we cache them.
+        self._keys: Dict[KeyPaths, str] = {}
+        # Whether the storage can put and get objects synchronously. If so,
+        # single operations of the synchronous methods skip the event loop.
+        # See "_get_blocking" and "_put_blocking".
+        self._sync_storage = (_defined_together(store, "put", "put_sync")
+                              and _defined_together(store, "get", "get_sync"))
 
     def load_step_output(self, step_id: StepID) -> Any:
         """Load the output of the workflow step from checkpoint.
@@ -107,7 +206,12 @@ class WorkflowStorage:
         Returns:
             Output of the workflow step.
         """
-        return asyncio_run(self._get(self._key_step_output(step_id)))
+        return self._get_blocking(
+            self._make_key(self._key_step_output(step_id)))
+
+    async def load_step_output_async(self, step_id: StepID) -> Any:
+        """Async version of `load_step_output`."""
+        return await self._get(self._key_step_output(step_id))
 
     def save_step_output(self, step_id: StepID, ret: Union[Workflow, Any],
                          outer_most_step_id: Optional[StepID]) -> None:
@@ -123,6 +227,13 @@ class WorkflowStorage:
             outer_most_step_id: See
                 "step_executor.execute_workflow" for explanation.
         """
+        asyncio_run(
+            self.save_step_output_async(step_id, ret, outer_most_step_id))
+
+    async def save_step_output_async(
+            self, step_id: StepID, ret: Union[Workflow, Any],
+            outer_most_step_id: Optional[StepID]) -> None:
+        """Async version of `save_step_output`."""
         tasks = []
         if isinstance(ret, Workflow):
             # This workflow step returns a nested workflow.
@@ -134,7 +245,7 @@ class WorkflowStorage:
             dynamic_output_id = ret.step_id
         else:
             # This workflow step returns a object.
-            ret = ray.get(ret) if isinstance(ret, ray.ObjectRef) else ret
+            ret = await ret if isinstance(ret, ray.ObjectRef) else ret
             tasks.append(self._put(self._key_step_output(step_id), ret))
             dynamic_output_id = step_id
         # outer_most_step_id == "" indicates the root step of a workflow.
@@ -144,31 +255,43 @@ class WorkflowStorage:
             tasks.append(
                 self._update_dynamic_output(outer_most_step_id,
                                             dynamic_output_id))
-        asyncio_run(asyncio.gather(*tasks))
+        await asyncio.gather(*tasks)
 
-    def load_step_func_body(self, step_id: StepID) -> Callable:
+    def load_step_func_body(self,
+                            step_id: StepID,
+                            func_body_digest: Optional[str] = None
+                            ) -> Callable:
         """Load the function body of the workflow step.
 
         Args:
             step_id: ID of the workflow step.
+            func_body_digest: The digest of the function body. See
+                "StepInspectResult.func_body_digest". If it is None, the
+                function body is saved for the step alone.
 
         Returns:
             A callable function.
         """
-        return asyncio_run(self._get(self._key_step_function_body(step_id)))
+        if func_body_digest is None:
+            return self._get_blocking(
+                self._make_key(self._key_step_function_body(step_id)))
+        return self._load_body_blocking(func_body_digest)
+
+    async def load_step_func_body_async(self,
+                                        step_id: StepID,
+                                        func_body_digest: Optional[str] = None
+                                        ) -> Callable:
+        """Async version of `load_step_func_body`."""
+        if func_body_digest is None:
+            return await self._get(self._key_step_function_body(step_id))
+        return await self._load_body(func_body_digest)
 
     def gen_step_id(self, step_name: str) -> int:
-        async def _gen_step_id():
-            key = self._key_num_steps_with_name(step_name)
-            try:
-                val = await self._get(key, True)
-                await self._put(key, val + 1, True)
-                return val + 1
-            except KeyNotFoundError:
-                await self._put(key, 0, True)
-                return 0
-
-        return asyncio_run(_gen_step_id())
+        return asyncio_run(self.gen_step_id_async(step_name))
+
+    async def gen_step_id_async(self, step_name: str) -> int:
+        """Async version of `gen_step_id`."""
+        return await self._incr(self._key_num_steps_with_name(step_name))
 
     def load_step_args(
             self, step_id: StepID, workflows: List[Any],
@@ -187,10 +310,18 @@ class WorkflowStorage:
         Returns:
             Args and kwargs.
         """
+        return asyncio_run(
+            self.load_step_args_async(step_id, workflows, object_refs,
+                                      workflow_refs))
+
+    async def load_step_args_async(
+            self, step_id: StepID, workflows: List[Any],
+            object_refs: List[ray.ObjectRef],
+            workflow_refs: List[WorkflowRef]) -> Tuple[List, Dict[str, Any]]:
+        """Async version of `load_step_args`."""
         with serialization_context.workflow_args_resolving_context(
                 workflows, object_refs, workflow_refs):
-            flattened_args = asyncio_run(
-                self._get(self._key_step_args(step_id)))
+            flattened_args = await self._get(self._key_step_args(step_id))
             return signature.recover_args(flattened_args)
 
     def save_object_ref(self, obj_ref: ray.ObjectRef) -> None:
@@ -202,12 +333,14 @@ class WorkflowStorage:
         Returns:
             None
         """
+        self._put_blocking(self._make_obj_key(obj_ref.hex()), ray.get(obj_ref))
 
-        async def _save_object_ref():
-            data = await obj_ref
-            await self._put(self._key_obj_id(obj_ref.hex()), data)
-
-        return asyncio_run(_save_object_ref())
+    async def save_object_ref_async(self, obj_ref: ray.ObjectRef) -> None:
+        """Async version of `save_object_ref`."""
+        # The large buffers of the data (e.g. numpy arrays) are zero-copy
+        # views of the object store, and they are written to storage as is.
+        data = await obj_ref
+        await self._put_precomputed(self._make_obj_key(obj_ref.hex()), data)
 
     def load_object_ref(self, object_id: str) -> ray.ObjectRef:
         """Load the input object ref.
@@ -218,13 +351,14 @@ class WorkflowStorage:
         Returns:
             The object ref.
         """
+        return ray.put(self._get_blocking(self._make_obj_key(object_id)))
 
-        async def _load_obj_ref() -> ray.ObjectRef:
-            data = await self._get(self._key_obj_id(object_id))
-            ref = ray.put(data)
-            return ref
-
-        return asyncio_run(_load_obj_ref())
+    async def load_object_ref_async(self, object_id: str) -> ray.ObjectRef:
+        """Async version of `load_object_ref`."""
+        data = await self._get_precomputed(self._make_obj_key(object_id))
+        # The large buffers of the data are views of the buffer read from
+        # storage, so "ray.put" copies them into the object store only once.
+        return ray.put(data)
 
     async def _update_dynamic_output(self, outer_most_step_id: StepID,
                                      dynamic_output_step_id: StepID) -> None:
@@ -249,21 +383,26 @@ class WorkflowStorage:
                 "step_executor.execute_workflow" for explanation.
             dynamic_output_step_id: ID of dynamic_step.
         """
-        metadata = await self._get(
-            self._key_step_output_metadata(outer_most_step_id), True)
-        if (dynamic_output_step_id != metadata["output_step_id"]
-                and dynamic_output_step_id !=
-                metadata.get("dynamic_output_step_id")):
-            metadata["dynamic_output_step_id"] = dynamic_output_step_id
-            await self._put(
-                self._key_step_output_metadata(outer_most_step_id), metadata,
-                True)
+
+        def _update(metadata: Optional[Dict[str, Any]]
+                    ) -> Optional[Dict[str, Any]]:
+            if metadata is None:
+                # the outer most step has not saved its output metadata
+                raise KeyNotFoundError(outer_most_step_id)
+            if (dynamic_output_step_id != metadata["output_step_id"]
+                    and dynamic_output_step_id !=
+                    metadata.get("dynamic_output_step_id")):
+                metadata["dynamic_output_step_id"] = dynamic_output_step_id
+                return metadata
+            return None
+
+        await self._update_json(
+            self._key_step_output_metadata(outer_most_step_id), _update)
 
     async def _locate_output_step_id(self, step_id: StepID) -> str:
         metadata = await self._get(
             self._key_step_output_metadata(step_id), True)
-        return (metadata.get("dynamic_output_step_id")
-                or metadata["output_step_id"])
+        return _output_step_id_from_metadata(metadata)
 
     def get_entrypoint_step_id(self) -> StepID:
         """Load the entrypoint step ID of the workflow.
@@ -271,9 +410,13 @@ class WorkflowStorage:
         Returns:
             The ID of the entrypoint step.
         """
+        return asyncio_run(self.get_entrypoint_step_id_async())
+
+    async def get_entrypoint_step_id_async(self) -> StepID:
+        """Async version of `get_entrypoint_step_id`."""
         # empty StepID represents the workflow driver
         try:
-            return asyncio_run(self._locate_output_step_id(""))
+            return await self._locate_output_step_id("")
         except Exception as e:
             raise ValueError("Fail to get entrypoint step ID from workflow"
                              f"[id={self._workflow_id}]") from e
@@ -291,30 +434,115 @@ class WorkflowStorage:
         """
         return asyncio_run(self._inspect_step(step_id))
 
+    async def inspect_step_async(self, step_id: StepID) -> StepInspectResult:
+        """Async version of `inspect_step`."""
+        return await self._inspect_step(step_id)
+
+    def inspect_steps(self, step_ids: List[StepID]) -> List[StepInspectResult]:
+        """Get the status of a batch of workflow steps. The steps are
+        inspected concurrently.
+
+        Args:
+            step_ids: The IDs of the workflow steps.
+
+        Returns:
+            The status of the steps, in the same order as the IDs.
+        """
+        return asyncio_run(self._inspect_step_batch(step_ids))
+
+    async def inspect_steps_async(
+            self, step_ids: List[StepID]) -> List[StepInspectResult]:
+        """Async version of `inspect_steps`."""
+        return await self._inspect_step_batch(step_ids)
+
+    async def _inspect_step_batch(
+            self, step_ids: List[StepID]) -> List[StepInspectResult]:
+        return await asyncio.gather(
+            *[self._inspect_step(step_id) for step_id in step_ids])
+
+    def inspect_step_with_output(
+            self, step_id: StepID) -> Tuple[StepInspectResult, Any]:
+        """Get the status of a workflow step, and load its output if the
+        step has an output checkpoint. The output is loaded along with
+        inspecting the step, so it does not take an extra round trip.
+
+        Args:
+            step_id: The ID of a workflow step.
+
+        Returns:
+            The status of the step, and the output of the step. The output
+            is None if "output_object_valid" of the status is not set.
+        """
+        return asyncio_run(self._inspect_step_with_output(step_id))
+
+    async def inspect_step_with_output_async(
+            self, step_id: StepID) -> Tuple[StepInspectResult, Any]:
+        """Async version of `inspect_step_with_output`."""
+        return await self._inspect_step_with_output(step_id)
+
+    async def _inspect_step_with_output(
+            self, step_id: StepID) -> Tuple[StepInspectResult, Any]:
+        # The output is fetched speculatively, and discarded if the step
+        # does not have an output checkpoint.
+        result, output = await asyncio.gather(
+            self._inspect_step(step_id),
+            self._get(self._key_step_output(step_id)),
+            return_exceptions=True)
+        if isinstance(result, Exception):
+            raise result
+        if not result.output_object_valid:
+            return result, None
+        if isinstance(output, Exception):
+            # The output could be written after we fetched it.
+            output = await self._get(self._key_step_output(step_id))
+        return result, output
+
     async def _inspect_step(self, step_id: StepID) -> StepInspectResult:
-        items = await self._scan(self._key_step_prefix(step_id))
-        keys = set(items)
+        # We fetch the output and input metadata speculatively along with
+        # scanning the step, so inspecting a step only takes a single round
+        # trip. The results are discarded if the scan proves them absent.
+        items, output_metadata, input_metadata = await asyncio.gather(
+            self._scan(self._key_step_prefix(step_id)),
+            self._get(self._key_step_output_metadata(step_id), True),
+            self._get(self._key_step_input_metadata(step_id), True),
+            return_exceptions=True)
+        if isinstance(items, Exception):
+            raise items
+        mask = 0
+        for item in items:
+            mask |= _STEP_FILE_BITS.get(item, 0)
         field_list = StepStatus(
-            output_object_exists=(STEP_OUTPUT in keys),
-            output_metadata_exists=(STEP_OUTPUTS_METADATA in keys),
-            input_metadata_exists=(STEP_INPUTS_METADATA in keys),
-            args_exists=(STEP_ARGS in keys),
-            func_body_exists=(STEP_FUNC_BODY in keys))
+            output_object_exists=bool(mask & _STEP_FILE_BITS[STEP_OUTPUT]),
+            output_metadata_exists=bool(
+                mask & _STEP_FILE_BITS[STEP_OUTPUTS_METADATA]),
+            input_metadata_exists=bool(
+                mask & _STEP_FILE_BITS[STEP_INPUTS_METADATA]),
+            args_exists=bool(mask & _STEP_FILE_BITS[STEP_ARGS]),
+            func_body_exists=bool(mask & _STEP_FILE_BITS[STEP_FUNC_BODY]))
         # does this step contains output checkpoint file?
         if field_list.output_object_exists:
             return StepInspectResult(output_object_valid=True)
         # do we know where the output comes from?
         if field_list.output_metadata_exists:
-            output_step_id = await self._locate_output_step_id(step_id)
-            return StepInspectResult(output_step_id=output_step_id)
+            if isinstance(output_metadata, Exception):
+                # The metadata could be written after we fetched it.
+                output_metadata = await self._get(
+                    self._key_step_output_metadata(step_id), True)
+            return StepInspectResult(
+                output_step_id=_output_step_id_from_metadata(output_metadata))
 
         # read inputs metadata
         try:
-            metadata = await self._get(
-                self._key_step_input_metadata(step_id), True)
+            if isinstance(input_metadata, Exception):
+                raise input_metadata
+            metadata = input_metadata
+            # The metadata is written after the function body, so it must
+            # exist if the metadata refers to it.
+            func_body_digest = metadata.get("func_body_digest")
             return StepInspectResult(
                 args_valid=field_list.args_exists,
-                func_body_valid=field_list.func_body_exists,
+                func_body_valid=(field_list.func_body_exists
+                                 or func_body_digest is not None),
                 object_refs=metadata["object_refs"],
                 workflows=metadata["workflows"],
                 workflow_refs=metadata["workflow_refs"],
@@ -322,27 +550,13 @@ class WorkflowStorage:
                 catch_exceptions=metadata.get("catch_exceptions"),
                 ray_options=metadata.get("ray_options", {}),
                 step_type=StepType[metadata.get("step_type")],
+                func_body_digest=func_body_digest,
             )
         except Exception:
             return StepInspectResult(
                 args_valid=field_list.args_exists,
                 func_body_valid=field_list.func_body_exists)
 
-    async def _write_step_inputs(self, step_id: StepID,
-                                 inputs: WorkflowData) -> None:
-        """Save workflow inputs."""
-        metadata = inputs.to_metadata()
-        with serialization_context.workflow_args_keeping_context():
-            # TODO(suquark): in the future we should write to storage directly
-            # with plasma store object in memory.
-            args_obj = ray.get(inputs.inputs.args)
-        save_tasks = [
-            self._put(self._key_step_input_metadata(step_id), metadata, True),
-            self._put(self._key_step_function_body(step_id), inputs.func_body),
-            self._put(self._key_step_args(step_id), args_obj)
-        ]
-        await asyncio.gather(*save_tasks)
-
     def save_subworkflow(self, workflow: Workflow) -> None:
         """Save the DAG and inputs of the sub-workflow.
 
@@ -350,12 +564,46 @@ class WorkflowStorage:
             workflow: A sub-workflow. Could be a nested workflow inside
                 a workflow step.
         """
+        asyncio_run(self.save_subworkflow_async(workflow))
+
+    async def save_subworkflow_async(self, workflow: Workflow) -> None:
+        """Async version of `save_subworkflow`."""
         assert not workflow.executed
-        tasks = [
-            self._write_step_inputs(w.step_id, w.data)
-            for w in workflow.iter_workflows_in_dag()
-        ]
-        asyncio_run(asyncio.gather(*tasks))
+        workflows = list(workflow.iter_workflows_in_dag())
+        # Function bodies shared by steps are only pickled and saved once.
+        func_body_digests: Dict[int, str] = {}
+        items = []
+        for w in workflows:
+            func_body = w.data.func_body
+            if id(func_body) not in func_body_digests:
+                digest, data = _dumps_body(func_body)
+                func_body_digests[id(func_body)] = digest
+                items.append((self._key_body(digest), data, False))
+        # The function bodies do not depend on the arguments, so we save
+        # them while fetching the arguments.
+        save_func_bodies = asyncio.ensure_future(self._put_many(items))
+        try:
+            # Fetching the arguments blocks, so we do it outside of the
+            # event loop to avoid stalling other storage operations.
+            args_list = await asyncio.get_event_loop().run_in_executor(
+                None, _get_step_args, [w.data.inputs.args for w in workflows])
+        except Exception:
+            # Do not leave the saving unawaited.
+            await asyncio.gather(save_func_bodies, return_exceptions=True)
+            raise
+        items = [(self._key_step_args(w.step_id), args, False)
+                 for w, args in zip(workflows, args_list)]
+        await asyncio.gather(save_func_bodies, self._put_many(items))
+        # The metadata refers to the function bodies, so it must be written
+        # after them to keep the checkpoint consistent.
+        items = []
+        for w in workflows:
+            metadata = w.data.to_metadata()
+            metadata["func_body_digest"] = func_body_digests[id(
+                w.data.func_body)]
+            items.append((self._key_step_input_metadata(w.step_id), metadata,
+                          True))
+        await self._put_many(items)
 
     def load_actor_class_body(self) -> type:
         """Load the class body of the virtual actor.
@@ -363,7 +611,19 @@ class WorkflowStorage:
         Raises:
             DataLoadError: if we fail to load the class body.
         """
-        return asyncio_run(self._get(self._key_class_body()))
+        class_body = self._get_blocking(
+            self._class_body_digest_key, True, missing_ok=True)
+        if class_body is None:
+            return self._get_blocking(self._class_body_key)
+        return self._load_body_blocking(class_body["digest"])
+
+    async def load_actor_class_body_async(self) -> type:
+        """Async version of `load_actor_class_body`."""
+        class_body = await self._get_precomputed(
+            self._class_body_digest_key, True, missing_ok=True)
+        if class_body is None:
+            return await self._get_precomputed(self._class_body_key)
+        return await self._load_body(class_body["digest"])
 
     def save_actor_class_body(self, cls: type) -> None:
         """Save the class body of the virtual actor.
@@ -374,7 +634,20 @@ class WorkflowStorage:
         Raises:
             DataSaveError: if we fail to save the class body.
         """
-        asyncio_run(self._put(self._key_class_body(), cls))
+        digest, data = _dumps_body(cls)
+        self._put_blocking(self._make_key(self._key_body(digest)), data)
+        # The digest refers to the class body, so it must be written after
+        # the class body.
+        self._put_blocking(self._class_body_digest_key, {"digest": digest},
+                           True)
+
+    async def save_actor_class_body_async(self, cls: type) -> None:
+        """Async version of `save_actor_class_body`."""
+        digest, data = _dumps_body(cls)
+        await self._put(self._key_body(digest), data)
+        # See "save_actor_class_body".
+        await self._put_precomputed(self._class_body_digest_key,
+                                    {"digest": digest}, True)
 
     def save_workflow_meta(self, metadata: WorkflowMetaData) -> None:
         """Save the metadata of the current workflow.
@@ -385,11 +658,14 @@ class WorkflowStorage:
         Raises:
             DataSaveError: if we fail to save the class body.
         """
+        self._put_blocking(self._workflow_meta_key,
+                           _workflow_meta_to_json(metadata), True)
 
-        metadata = {
-            "status": metadata.status.value,
-        }
-        asyncio_run(self._put(self._key_workflow_metadata(), metadata, True))
+    async def save_workflow_meta_async(self,
+                                       metadata: WorkflowMetaData) -> None:
+        """Async version of `save_workflow_meta`."""
+        await self._put_precomputed(self._workflow_meta_key,
+                                    _workflow_meta_to_json(metadata), True)
 
     def load_workflow_meta(self) -> Optional[WorkflowMetaData]:
         """Load the metadata of the current workflow.
@@ -398,27 +674,29 @@ class WorkflowStorage:
             The metadata of the current workflow. If it doesn't exist,
             return None.
         """
+        return _workflow_meta_from_json(
+            self._get_blocking(self._workflow_meta_key, True, missing_ok=True))
 
-        try:
-            metadata = asyncio_run(
-                self._get(self._key_workflow_metadata(), True))
-            return WorkflowMetaData(status=WorkflowStatus(metadata["status"]))
-        except KeyNotFoundError:
-            return None
+    async def load_workflow_meta_async(self) -> Optional[WorkflowMetaData]:
+        """Async version of `load_workflow_meta`."""
+        return _workflow_meta_from_json(await self._get_precomputed(
+            self._workflow_meta_key, True, missing_ok=True))
 
     async def _list_workflow(self) -> List[Tuple[str, WorkflowStatus]]:
         prefix = self._storage.make_key("")
         workflow_ids = await self._storage.scan_prefix(prefix)
-        metadata = await asyncio.gather(*[
-            self._get([workflow_id, WORKFLOW_META], True)
-            for workflow_id in workflow_ids
-        ])
+        paths_list = [(wid, WORKFLOW_META) for wid in workflow_ids]
+        metadata = await self._get_many(paths_list, True)
         return [(wid, WorkflowStatus(meta["status"]) if meta else None)
                 for (wid, meta) in zip(workflow_ids, metadata)]
 
     def list_workflow(self) -> List[Tuple[str, WorkflowStatus]]:
         return asyncio_run(self._list_workflow())
 
+    async def list_workflow_async(self) -> List[Tuple[str, WorkflowStatus]]:
+        """Async version of `list_workflow`."""
+        return await self._list_workflow()
+
     def advance_progress(self, finished_step_id: "StepID") -> None:
         """Save the latest progress of a workflow. This is used by a
         virtual actor.
@@ -429,10 +707,13 @@ class WorkflowStorage:
         Raises:
             DataSaveError: if we fail to save the progress.
         """
-        asyncio_run(
-            self._put(self._key_workflow_progress(), {
-                "step_id": finished_step_id,
-            }, True))
+        self._put_blocking(self._workflow_progress_key,
+                           _progress_to_json(finished_step_id), True)
+
+    async def advance_progress_async(self, finished_step_id: "StepID") -> None:
+        """Async version of `advance_progress`."""
+        await self._put_precomputed(self._workflow_progress_key,
+                                    _progress_to_json(finished_step_id), True)
 
     def get_latest_progress(self) -> "StepID":
         """Load the latest progress of a workflow. This is used by a
@@ -444,68 +725,245 @@ class WorkflowStorage:
         Returns:
             The step that contains the latest output.
         """
-        return asyncio_run(self._get(self._key_workflow_progress(),
-                                     True))["step_id"]
+        return _progress_from_json(
+            self._get_blocking(self._workflow_progress_key, True))
 
-    async def _put(self, paths: List[str], data: Any,
+    async def get_latest_progress_async(self) -> "StepID":
+        """Async version of `get_latest_progress`."""
+        return _progress_from_json(await self._get_precomputed(
+            self._workflow_progress_key, True))
+
+    async def _put(self, paths: KeyPaths, data: Any,
                    is_json: bool = False) -> None:
+        await self._put_precomputed(self._make_key(paths), data, is_json)
+
+    async def _put_precomputed(self,
+                               key: str,
+                               data: Any,
+                               is_json: bool = False) -> None:
         try:
-            key = self._storage.make_key(*paths)
             await self._storage.put(key, data, is_json=is_json)
         except Exception as e:
             raise DataSaveError from e
 
-    async def _get(self, paths: List[str], is_json: bool = False) -> Any:
+    def _put_sync(self, key: str, data: Any, is_json: bool = False) -> None:
+        try:
+            self._storage.put_sync(key, data, is_json=is_json)
+        except Exception as e:
+            raise DataSaveError from e
+
+    def _put_blocking(self, key: str, data: Any,
+                      is_json: bool = False) -> None:
+        """Put an object for the synchronous methods. The storage is
+        accessed directly if it supports it."""
+        # Fail in a running event loop even if the storage would not use
+        # the event loop, so the methods behave the same for all storages.
+        _check_no_running_loop()
+        if self._sync_storage:
+            self._put_sync(key, data, is_json)
+        else:
+            asyncio_run(self._put_precomputed(key, data, is_json))
+
+    async def _put_many(self, items: List[Tuple[KeyPaths, Any, bool]]) -> None:
+        try:
+            items = [(self._make_key(paths), data, is_json)
+                     for paths, data, is_json in items]
+            await self._storage.put_many(items)
+        except Exception as e:
+            raise DataSaveError from e
+
+    async def _update_json(self, paths: KeyPaths,
+                           mutator: Callable[[Any], Any]) -> Any:
+        try:
+            key = self._make_key(paths)
+            return await self._storage.update_json(key, mutator)
+        except KeyNotFoundError:
+            raise
+        except Exception as e:
+            raise DataSaveError from e
+
+    async def _incr(self, paths: KeyPaths) -> int:
+        try:
+            key = self._make_key(paths)
+            return await self._storage.incr(key)
+        except Exception as e:
+            raise DataSaveError from e
+
+    async def _get(self, paths: KeyPaths, is_json: bool = False) -> Any:
+        return await self._get_precomputed(self._make_key(paths), is_json)
+
+    async def _get_precomputed(self,
+                               key: str,
+                               is_json: bool = False,
+                               missing_ok: bool = False) -> Any:
         try:
-            key = self._storage.make_key(*paths)
             return await self._storage.get(key, is_json=is_json)
         except KeyNotFoundError:
+            if missing_ok:
+                return None
             raise
         except Exception as e:
             raise DataLoadError from e
 
-    async def _scan(self, paths: List[str]) -> Any:
+    def _get_sync(self,
+                  key: str,
+                  is_json: bool = False,
+                  missing_ok: bool = False) -> Any:
+        try:
+            return self._storage.get_sync(key, is_json=is_json)
+        except KeyNotFoundError:
+            if missing_ok:
+                return None
+            raise
+        except Exception as e:
+            raise DataLoadError from e
+
+    def _get_blocking(self,
+                      key: str,
+                      is_json: bool = False,
+                      missing_ok: bool = False) -> Any:
+        """Get an object for the synchronous methods. The storage is
+        accessed directly if it supports it."""
+        # See "_put_blocking".
+        _check_no_running_loop()
+        if self._sync_storage:
+            return self._get_sync(key, is_json, missing_ok)
+        return asyncio_run(self._get_precomputed(key, is_json, missing_ok))
+
+    async def _get_many(self,
+                        paths_list: List[KeyPaths],
+                        is_json: bool = False) -> List[Optional[Any]]:
+        try:
+            keys = [self._make_key(paths) for paths in paths_list]
+            return await self._storage.get_many(keys, is_json=is_json)
+        except Exception as e:
+            raise DataLoadError from e
+
+    async def _scan(self, paths: KeyPaths) -> Any:
         try:
-            prefix = self._storage.make_key(*paths)
+            prefix = self._make_key(paths)
             return await self._storage.scan_prefix(prefix)
         except Exception as e:
             raise DataLoadError from e
 
+    def _make_key(self, paths: KeyPaths) -> str:
+        key = self._keys.get(paths)
+        if key is None:
+            key = self._storage.make_key(*paths)
+            self._keys[paths] = key
+        return key
+
+    def _make_obj_key(self, object_id: str) -> str:
+        # Each object is only saved or loaded once, so we do not cache
+        # its key.
+        return self._storage.make_key(*self._key_obj_id(object_id))
+
+    async def _load_body(self, digest: str) -> Any:
+        """Load a function or class body by its digest through the body
+        cache of the process."""
+        key = self._make_key(self._key_body(digest))
+        cache_key = (self._storage.storage_url, key)
+        body = _get_cached_body(cache_key)
+        if body is None:
+            body = _cache_body(
+                cache_key,
+                ray.cloudpickle.loads(await self._get_precomputed(key)))
+        return body
+
+    def _load_body_blocking(self, digest: str) -> Any:
+        """Blocking version of `_load_body`."""
+        key = self._make_key(self._key_body(digest))
+        cache_key = (self._storage.storage_url, key)
+        body = _get_cached_body(cache_key)
+        if body is None:
+            body = _cache_body(cache_key,
+                               ray.cloudpickle.loads(self._get_blocking(key)))
+        return body
+
     # The following functions are helper functions to get the key
     # for a specific fields
 
-    def _key_workflow_progress(self):
-        return [self._workflow_id, STEPS_DIR, WORKFLOW_PROGRESS]
-
     def _key_step_input_metadata(self, step_id):
-        return [self._workflow_id, STEPS_DIR, step_id, STEP_INPUTS_METADATA]
+        return (self._workflow_id, STEPS_DIR, step_id, STEP_INPUTS_METADATA)
 
     def _key_step_output(self, step_id):
-        return [self._workflow_id, STEPS_DIR, step_id, STEP_OUTPUT]
+        return (self._workflow_id, STEPS_DIR, step_id, STEP_OUTPUT)
 
     def _key_step_output_metadata(self, step_id):
-        return [self._workflow_id, STEPS_DIR, step_id, STEP_OUTPUTS_METADATA]
+        return (self._workflow_id, STEPS_DIR, step_id, STEP_OUTPUTS_METADATA)
 
     def _key_step_function_body(self, step_id):
-        return [self._workflow_id, STEPS_DIR, step_id, STEP_FUNC_BODY]
+        return (self._workflow_id, STEPS_DIR, step_id, STEP_FUNC_BODY)
 
     def _key_step_args(self, step_id):
-        return [self._workflow_id, STEPS_DIR, step_id, STEP_ARGS]
+        return (self._workflow_id, STEPS_DIR, step_id, STEP_ARGS)
 
     def _key_obj_id(self, object_id):
-        return [self._workflow_id, OBJECTS_DIR, object_id]
+        return (self._workflow_id, OBJECTS_DIR, object_id)
+
+    def _key_body(self, digest):
+        return (self._workflow_id, BODIES_DIR, f"{digest}.pkl")
 
     def _key_step_prefix(self, step_id):
-        return [self._workflow_id, STEPS_DIR, step_id, ""]
+        return (self._workflow_id, STEPS_DIR, step_id, "")
 
-    def _key_class_body(self):
-        return [self._workflow_id, CLASS_BODY]
+    def _key_num_steps_with_name(self, name):
+        return (self._workflow_id, DUPLICATE_NAME_COUNTER, name)
 
-    def _key_workflow_metadata(self):
-        return [self._workflow_id, WORKFLOW_META]
 
-    def _key_num_steps_with_name(self, name):
-        return [self._workflow_id, DUPLICATE_NAME_COUNTER, name]
+def _defined_together(store: storage.Storage, method: str,
+                      sync_method: str) -> bool:
+    """Check whether the synchronous version of a storage method is defined
+    by the same class as the method, so a subclass that overrides only the
+    method is not bypassed."""
+    for cls in type(store).__mro__:
+        if method in vars(cls):
+            return sync_method in vars(cls)
+    return False
+
+
+def _dumps_body(body: Any) -> Tuple[str, bytes]:
+    """Pickle a function or class body.
+
+    Returns:
+        The digest of the pickled body, and the pickled body.
+    """
+    data = ray.cloudpickle.dumps(body)
+    return hashlib.sha1(data).hexdigest(), data
+
+
+def _workflow_meta_to_json(metadata: WorkflowMetaData) -> Dict[str, Any]:
+    return {"status": metadata.status.value}
+
+
+def _workflow_meta_from_json(
+        metadata: Optional[Dict[str, Any]]) -> Optional[WorkflowMetaData]:
+    if metadata is None:
+        return None
+    return WorkflowMetaData(status=WorkflowStatus(metadata["status"]))
+
+
+def _progress_to_json(finished_step_id: StepID) -> Dict[str, Any]:
+    return {"step_id": finished_step_id}
+
+
+def _progress_from_json(progress: Dict[str, Any]) -> StepID:
+    return progress["step_id"]
+
+
+def _output_step_id_from_metadata(metadata: Dict[str, Any]) -> StepID:
+    """Get the ID of the step that could contain the output checkpoint
+    from the output metadata of a step. The dynamic output step is
+    preferred, because it is a shortcut to the output."""
+    return (metadata.get("dynamic_output_step_id")
+            or metadata["output_step_id"])
+
+
+def _get_step_args(args_refs: List[ray.ObjectRef]) -> List[Any]:
+    with serialization_context.workflow_args_keeping_context():
+        # TODO(suquark): in the future we should write to storage directly
+        # with plasma store object in memory.
+        return ray.get(args_refs)
 
 
 def get_workflow_storage(workflow_id: Optional[str] = None) -> WorkflowStorage: